@@ -1,25 +1,42 @@
 import os
-import json
+import sys
 import time
+
+# Taken before the heavier imports so the startup report covers them.
+IMPORT_STARTED = time.perf_counter()
+
+import gzip
+import hmac
+import json
 import random
 import datetime
-import requests
-from flask import Flask, render_template, request, jsonify
+import threading
+from flask import Flask, render_template, request, jsonify, make_response
 
 # ---------- Paths & globals ----------
 
 BACKEND_DIR = os.path.abspath(os.path.dirname(__file__))
 ROOT_DIR = os.path.dirname(BACKEND_DIR)
-CONFIG_DIR = os.path.join(ROOT_DIR, "config")
+CONFIG_DIR = os.environ.get("NEXUS_CONFIG_DIR", os.path.join(ROOT_DIR, "config"))
 FRONTEND_DIR = os.path.join(ROOT_DIR, "frontend")
 
-os.makedirs(CONFIG_DIR, exist_ok=True)
-
 CONFIG_FILE = os.path.join(CONFIG_DIR, "config.json")
 SESSION_FILE = os.path.join(CONFIG_DIR, "session.json")
 
 DEFAULT_ESP32_URL = "http://192.168.1.50"
 
+# Startup budgets (Pi Zero class board). Exceeding them only warns, except
+# under --startup-check where it fails so regressions are caught.
+STARTUP_BUDGET_MS = float(os.environ.get("NEXUS_STARTUP_BUDGET_MS", "4000"))
+RSS_BUDGET_MB = float(os.environ.get("NEXUS_RSS_BUDGET_MB", "40"))
+
+# Voice pre-synthesis is CPU heavy; let the first page loads go first.
+VOICE_WARM_DELAY_SEC = 10
+
+# Clients count down locally from the deadlines in /session_status and only
+# re-sync at phase boundaries, on their own actions, or at this heartbeat.
+STATUS_HEARTBEAT_SEC = 15
+
 app = Flask(
     __name__,
     template_folder=os.path.join(FRONTEND_DIR, "templates"),
@@ -28,6 +45,15 @@ app = Flask(
 
 session_state = {}
 
+# Serialises the one-shot ESP32 lock in /session_status against itself and
+# against the unlocks at abort / finish.
+lock_fire_guard = threading.Lock()
+
+# Held by handlers that change session time/flags (including /session_status)
+# so a /bridge_command batch is applied as one transaction. ESP32 calls are
+# made outside it.
+state_lock = threading.RLock()
+
 # ---------- Config helpers ----------
 
 def load_config():
@@ -75,6 +101,10 @@ def load_config():
         # External bridge (generic automation / scripting)
         cfg.setdefault("external_bridge_enabled", False)
         cfg.setdefault("external_bridge_url", "")
+        # Inbound /bridge_command is separate from the outbound webhook and
+        # needs a shared token.
+        cfg.setdefault("bridge_commands_enabled", False)
+        cfg.setdefault("bridge_command_token", "")
 
         # Voice assistant
         cfg.setdefault("voice_enabled", False)
@@ -105,16 +135,24 @@ def load_config():
             "lock_to_7am": False,
             "external_bridge_enabled": False,
             "external_bridge_url": "",
+            "bridge_commands_enabled": False,
+            "bridge_command_token": "",
             "voice_enabled": False,
             "voice_persona": "neutral",
         }
 
-config = load_config()
+# Loaded by init_state(), not at import, so importing the module does no disk I/O.
+config = {}
+
+# Bumped on every save so /bootstrap can reuse its precomputed config parts.
+config_version = 0
 
 
 def save_config(cfg):
+    global config_version
     with open(CONFIG_FILE, "w") as f:
         json.dump(cfg, f, indent=2)
+    config_version += 1
 
 
 def load_session():
@@ -131,9 +169,17 @@ def save_session():
         json.dump(session_state, f, indent=2)
 
 
+def bump_session_version():
+    """Mark a client-visible change so pollers know to re-sync."""
+    session_state["version"] = session_state.get("version", 0) + 1
+
+
 def reset_session():
     global session_state
+    # Keep the version monotonic across resets so clients never see it repeat.
+    version = session_state.get("version", 0) + 1
     session_state = {
+        "version": version,
         "active": False,
         "phase": "idle",  # idle, pre_wait, decision_hold, punishment_delay, main, lockout, finished
         "created_at": None,
@@ -143,11 +189,13 @@ def reset_session():
         "punishment_delay_sec": 0,
         "main_duration_sec": 0,
         "total_added_sec": 0,
+        "bridge_added_sec": 0,
         "mistress_message": "",
         "last_event": "",
         "head_violation_count": 0,
         "head_thresholds": None,
         "coyote_pulse_pending": False,
+        "video_switch_pending": None,
         # Locking
         "lock_fired": False,
         # Video per-session state
@@ -158,7 +206,29 @@ def reset_session():
     save_session()
 
 
-load_session()
+state_loaded = False
+state_init_lock = threading.Lock()
+
+
+def init_state():
+    """Load config and session from disk (once)."""
+    global config, state_loaded
+    with state_init_lock:
+        if state_loaded:
+            return
+        os.makedirs(CONFIG_DIR, exist_ok=True)
+        config = load_config()
+        load_session()
+        state_loaded = True
+
+
+@app.before_request
+def ensure_state():
+    # main() loads state before serving; this covers imports of the module
+    # by other runners (e.g. tools/load_harness.py or a WSGI server).
+    if not state_loaded:
+        init_state()
+
 
 # ---------- Mistress & head tracking helpers ----------
 
@@ -252,6 +322,27 @@ def mistress_head_punishment_choice():
     return actions
 
 
+def add_session_time(extra_sec):
+    """Extend whichever part of the session is currently running."""
+    phase = session_state.get("phase", "idle")
+    if phase in ("pre_wait", "decision_hold", "punishment_delay"):
+        session_state["punishment_delay_sec"] += extra_sec
+    elif phase in ("main", "lockout"):
+        session_state["main_duration_sec"] += extra_sec
+    session_state["total_added_sec"] += extra_sec
+
+
+# ---------- Device HTTP client ----------
+
+def http_client():
+    """
+    requests is only needed to talk to the ESP32 and the bridge, and is one of
+    the heaviest imports we have, so it is pulled in on first device call.
+    """
+    import requests
+    return requests
+
+
 # ---------- ESP32 Lock Control ----------
 
 def esp32_lock():
@@ -261,7 +352,7 @@ def esp32_lock():
         print("ESP32: No URL configured.")
         return False
     try:
-        r = requests.get(url + "/lock", timeout=3)
+        r = http_client().get(url + "/lock", timeout=3)
         print("ESP32 LOCK response:", r.text)
         return True
     except Exception as e:
@@ -276,7 +367,7 @@ def esp32_unlock():
         print("ESP32: No URL configured.")
         return False
     try:
-        r = requests.get(url + "/unlock", timeout=3)
+        r = http_client().get(url + "/unlock", timeout=3)
         print("ESP32 UNLOCK response:", r.text)
         return True
     except Exception as e:
@@ -298,23 +389,28 @@ def test_unlock():
 
 # ---------- External Bridge (generic automation / webhooks) ----------
 
+def bridge_config_payload():
+    return {
+        "external_bridge_enabled": config.get("external_bridge_enabled", False),
+        "external_bridge_url": config.get("external_bridge_url", ""),
+        "bridge_commands_enabled": config.get("bridge_commands_enabled", False),
+        "bridge_command_token": config.get("bridge_command_token", ""),
+    }
+
+
 @app.route("/bridge_config", methods=["GET", "POST"])
 def bridge_config():
     global config
     if request.method == "GET":
-        return jsonify({
-            "external_bridge_enabled": config.get("external_bridge_enabled", False),
-            "external_bridge_url": config.get("external_bridge_url", ""),
-        })
+        return jsonify(bridge_config_payload())
 
     data = request.get_json(force=True, silent=True) or {}
     config["external_bridge_enabled"] = bool(data.get("external_bridge_enabled", False))
     config["external_bridge_url"] = str(data.get("external_bridge_url", "")).strip()
+    config["bridge_commands_enabled"] = bool(data.get("bridge_commands_enabled", False))
+    config["bridge_command_token"] = str(data.get("bridge_command_token", "")).strip()
     save_config(config)
-    return jsonify({"ok": True, "config": {
-        "external_bridge_enabled": config["external_bridge_enabled"],
-        "external_bridge_url": config["external_bridge_url"],
-    }})
+    return jsonify({"ok": True, "config": bridge_config_payload()})
 
 
 @app.route("/bridge_test", methods=["POST"])
@@ -338,12 +434,293 @@ def bridge_test():
     }
 
     try:
-        r = requests.post(url, json=payload, timeout=5)
+        r = http_client().post(url, json=payload, timeout=5)
         return jsonify({"ok": True, "status_code": r.status_code})
     except Exception as e:
         return jsonify({"ok": False, "error": str(e)}), 500
 
 
+# ---------- Inbound bridge commands ----------
+
+BRIDGE_COMMAND_MAX_ACTIONS = 200
+BRIDGE_COMMAND_MAX_ADD_MIN = 24 * 60
+# Caps on the summed add_time: per batch, and per session across batches.
+BRIDGE_BATCH_MAX_ADD_MIN = 24 * 60
+BRIDGE_SESSION_MAX_ADD_MIN = 2 * 24 * 60
+
+# Actions that only make sense while a session is running.
+BRIDGE_SESSION_ACTIONS = ("add_time", "pulse", "switch_video")
+
+
+def parse_bridge_action(action):
+    """
+    Validate one inbound action and return it normalised.
+    Raises ValueError with a user-facing message if it cannot be applied.
+    """
+    if not isinstance(action, dict):
+        raise ValueError("Action must be an object")
+    kind = action.get("type")
+
+    if kind == "add_time":
+        minutes = action.get("minutes", 0)
+        if isinstance(minutes, bool):
+            raise ValueError("minutes must be a number")
+        try:
+            minutes = float(minutes)
+        except (TypeError, ValueError):
+            raise ValueError("minutes must be a number")
+        # NaN fails this comparison too.
+        if not 0 < minutes <= BRIDGE_COMMAND_MAX_ADD_MIN:
+            raise ValueError("minutes must be between 0 and %d" % BRIDGE_COMMAND_MAX_ADD_MIN)
+        seconds = int(round(minutes * 60))
+        if seconds <= 0:
+            raise ValueError("minutes must add at least one second")
+        parsed = {"type": kind, "seconds": seconds}
+    elif kind == "pulse":
+        parsed = {"type": kind}
+    elif kind == "switch_video":
+        url = action.get("url")
+        if url is not None and (not isinstance(url, str) or not url.strip()):
+            raise ValueError("url must be a non-empty string")
+        # The session page loads this into an iframe / window.open, so
+        # anything but http(s) (javascript:, data:, ...) would run script.
+        if url is not None and not url.strip().lower().startswith(("http://", "https://")):
+            raise ValueError("url must be an http(s) URL")
+        parsed = {"type": kind, "url": url.strip() if url else None}
+    elif kind == "set_message":
+        message = action.get("message")
+        if not isinstance(message, str):
+            raise ValueError("message must be a string")
+        message = message.strip()
+        # Same limit as /voice_clip, so the message can still be spoken.
+        if len(message) > VOICE_MAX_TEXT:
+            raise ValueError("message must be at most %d characters" % VOICE_MAX_TEXT)
+        parsed = {"type": kind, "message": message}
+    else:
+        raise ValueError("Unknown action type: %r" % (kind,))
+
+    if kind in BRIDGE_SESSION_ACTIONS and not session_state.get("active"):
+        raise ValueError("No active session.")
+    return parsed
+
+
+def check_bridge_time_caps(parsed):
+    """Raise ValueError if a batch would add more time than the caps allow."""
+    batch_sec = sum(a["seconds"] for a in parsed if a["type"] == "add_time")
+    if batch_sec > BRIDGE_BATCH_MAX_ADD_MIN * 60:
+        raise ValueError("add_time may total at most %d minutes per batch"
+                         % BRIDGE_BATCH_MAX_ADD_MIN)
+    if session_state.get("bridge_added_sec", 0) + batch_sec > BRIDGE_SESSION_MAX_ADD_MIN * 60:
+        raise ValueError("add_time may total at most %d minutes per session"
+                         % BRIDGE_SESSION_MAX_ADD_MIN)
+
+
+def apply_bridge_action(action):
+    """Apply a parsed action to session_state. Must not fail after parsing."""
+    kind = action["type"]
+    if kind == "add_time":
+        add_session_time(action["seconds"])
+        session_state["bridge_added_sec"] = session_state.get("bridge_added_sec", 0) + action["seconds"]
+        return {"added_sec": action["seconds"]}
+    if kind == "pulse":
+        session_state["coyote_pulse_pending"] = True
+        return {}
+    if kind == "switch_video":
+        session_state["video_switch_pending"] = {"url": action["url"]}
+        session_state["last_event"] = "bridge_video_switch"
+        return {}
+    if kind == "set_message":
+        session_state["mistress_message"] = action["message"]
+        return {}
+    return {}
+
+
+@app.route("/bridge_command", methods=["POST"])
+def bridge_command():
+    """
+    Inbound automation: apply a batch of typed actions in one transaction.
+
+      {"actions": [{"type": "add_time", "minutes": 10},
+                   {"type": "pulse"},
+                   {"type": "switch_video", "url": "https://..."},
+                   {"type": "set_message", "message": "..."}]}
+
+    Either every action is applied (with a single session.json write) or,
+    if any fails validation, none are. An optional "id" on each action is
+    echoed in its result so pipelined scripts can match them up.
+
+    Requires bridge_commands_enabled and the configured bridge_command_token
+    in the X-Bridge-Token header. Added time is capped per batch and per
+    session (BRIDGE_BATCH_MAX_ADD_MIN / BRIDGE_SESSION_MAX_ADD_MIN).
+    """
+    if not config.get("bridge_commands_enabled", False):
+        return jsonify({"ok": False, "error": "Inbound commands not enabled"}), 400
+    token = config.get("bridge_command_token", "")
+    if not token:
+        return jsonify({"ok": False, "error": "No command token configured"}), 400
+    sent = request.headers.get("X-Bridge-Token", "")
+    if not hmac.compare_digest(sent.encode("utf-8"), token.encode("utf-8")):
+        return jsonify({"ok": False, "error": "Invalid token"}), 403
+
+    data = request.get_json(force=True, silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"ok": False, "error": "Body must be a JSON object"}), 400
+    actions = data.get("actions")
+    if not isinstance(actions, list) or not actions:
+        return jsonify({"ok": False, "error": "actions must be a non-empty list"}), 400
+    if len(actions) > BRIDGE_COMMAND_MAX_ACTIONS:
+        return jsonify({
+            "ok": False,
+            "error": "At most %d actions per batch" % BRIDGE_COMMAND_MAX_ACTIONS,
+        }), 400
+
+    with state_lock:
+        parsed = []
+        results = []
+        failed = False
+        for i, action in enumerate(actions):
+            result = {"index": i, "type": action.get("type") if isinstance(action, dict) else None}
+            if isinstance(action, dict) and "id" in action:
+                result["id"] = action["id"]
+            try:
+                parsed.append(parse_bridge_action(action))
+                result["ok"] = True
+            except ValueError as e:
+                result["ok"] = False
+                result["error"] = str(e)
+                failed = True
+            results.append(result)
+
+        error = "Batch rejected"
+        if not failed:
+            try:
+                check_bridge_time_caps(parsed)
+            except ValueError as e:
+                error = str(e)
+                failed = True
+
+        if failed:
+            for result in results:
+                if result["ok"]:
+                    result["ok"] = False
+                    result["error"] = "Not applied: batch rejected"
+            return jsonify({"ok": False, "error": error, "results": results}), 400
+
+        session_state["last_event"] = "bridge_command"
+        for result, action in zip(results, parsed):
+            result.update(apply_bridge_action(action))
+
+        bump_session_version()
+        save_session()
+        version = session_state.get("version", 0)
+
+    return jsonify({"ok": True, "applied": len(parsed), "results": results, "state_version": version})
+
+
+# ---------- Voice ----------
+
+# Fixed lines spoken by the server and by main.js. Numbers inside them are
+# placeholders: only the surrounding phrases are pre-synthesised, the numbers
+# come from the cached number words.
+VOICE_PHRASES = [
+    "You looked away. Keep your attention where it belongs.",
+    "You lost focus. +0 minutes added.",
+    "That lapse did not go unnoticed.",
+    "If you drift, I narrow your world down for you.",
+    "You keep testing limits. +0 minutes and refocused attention.",
+    "You tried to escape the focus. +0 minutes.",
+    "Session started. Your control ends here.",
+    "Lockout until 07:00.",
+    "Session complete. You may release yourself.",
+    "Session has begun. You don't touch the controls anymore.",
+    "Session aborted.",
+    "Abort is disabled in strict or hardcore mode.",
+    "You tried to exit. 0 minutes added.",
+]
+VOICE_MAX_TEXT = 300
+
+voice_service = None
+voice_checked = False
+voice_init_lock = threading.Lock()
+
+
+def get_voice():
+    """Create the voice subsystem on first use; None if there is no TTS engine."""
+    global voice_service, voice_checked
+    with voice_init_lock:
+        if not voice_checked:
+            import voice
+            engine = voice.make_engine()
+            if engine is not None:
+                voice_service = voice.Voice(
+                    engine,
+                    voice.ClipCache(os.path.join(CONFIG_DIR, "voice_cache")),
+                )
+            voice_checked = True
+    return voice_service
+
+
+def warm_voice():
+    """Pre-synthesise the fixed phrases for the current persona in the background."""
+    if config.get("voice_enabled", False):
+        v = get_voice()
+        if v is not None:
+            v.warm_async(VOICE_PHRASES, config.get("voice_persona", "neutral"))
+
+
+@app.route("/voice_clip")
+def voice_clip():
+    """WAV for a message in the given (or configured) persona."""
+    if not config.get("voice_enabled", False):
+        return jsonify({"error": "Voice disabled"}), 404
+
+    text = request.args.get("text", "").strip()
+    if not text or len(text) > VOICE_MAX_TEXT:
+        return jsonify({"error": "text must be 1-%d characters" % VOICE_MAX_TEXT}), 400
+    v = get_voice()
+    if v is None:
+        return jsonify({"error": "No TTS engine available"}), 503
+    import voice
+    persona = voice.resolve_persona(
+        request.args.get("persona"), config.get("voice_persona", "neutral"))
+    # The clip depends on the engine as well as text and persona, and the
+    # engine can change (placeholder -> espeak after install.sh), so browsers
+    # only keep clips briefly and then revalidate against the ETag.
+    tag = v.clip_tag(text, persona)
+    if tag in request.if_none_match:
+        resp = make_response("", 304)
+        resp.set_etag(tag)
+        resp.headers["Cache-Control"] = "public, max-age=300"
+        return resp
+    try:
+        data = v.clip(text, persona)
+    except Exception as e:
+        print("Voice clip failed:", e)
+        return jsonify({"error": str(e)}), 500
+    if not data:
+        return jsonify({"error": "Nothing to speak"}), 400
+
+    resp = make_response(data)
+    resp.headers["Content-Type"] = "audio/wav"
+    resp.set_etag(tag)
+    resp.headers["Cache-Control"] = "public, max-age=300"
+    return resp
+
+
+@app.route("/voice_status")
+def voice_status():
+    status = {
+        "voice_enabled": config.get("voice_enabled", False),
+        "voice_persona": config.get("voice_persona", "neutral"),
+    }
+    if status["voice_enabled"]:
+        v = get_voice()
+        status["engine"] = None
+        if v is not None:
+            status.update(v.stats())
+    return jsonify(status)
+
+
 # ---------- Basic pages ----------
 
 @app.route("/")
@@ -403,6 +780,8 @@ def config_endpoint():
             config[key] = data[key]
 
     save_config(config)
+    if "voice_enabled" in data or "voice_persona" in data:
+        warm_voice()
     return jsonify({"ok": True, "config": config})
 
 
@@ -413,14 +792,18 @@ MISTRESS_VIDEO_URLS = [
 ]
 
 
+def video_config_payload():
+    return {
+        "video_urls": config.get("video_urls", []),
+        "video_enabled": config.get("video_enabled", True),
+    }
+
+
 @app.route("/video_config", methods=["GET", "POST"])
 def video_config():
     global config
     if request.method == "GET":
-        return jsonify({
-            "video_urls": config.get("video_urls", []),
-            "video_enabled": config.get("video_enabled", True),
-        })
+        return jsonify(video_config_payload())
 
     data = request.get_json(force=True, silent=True) or {}
     urls = data.get("video_urls", [])
@@ -449,50 +832,48 @@ def video_violation():
     Adjust time and state accordingly.
     """
     global session_state
-    if not session_state.get("active"):
-        return jsonify({"ok": True, "note": "No active session."})
-
-    extra_min = random.randint(5, 30)
-    if config.get("hardcore_mode"):
-        extra_min += random.randint(10, 30)
-
-    extra_sec = extra_min * 60
-    phase = session_state.get("phase", "idle")
+    with state_lock:
+        if not session_state.get("active"):
+            return jsonify({"ok": True, "note": "No active session."})
 
-    if phase in ("pre_wait", "decision_hold", "punishment_delay"):
-        session_state["punishment_delay_sec"] += extra_sec
-    elif phase in ("main", "lockout"):
-        session_state["main_duration_sec"] += extra_sec
+        extra_min = random.randint(5, 30)
+        if config.get("hardcore_mode"):
+            extra_min += random.randint(10, 30)
 
-    session_state["total_added_sec"] += extra_sec
-    session_state["mistress_message"] = (
-        f"You tried to escape the focus. +{extra_min} minutes."
-    )
-    session_state["last_event"] = "video_violation"
-    session_state["coyote_pulse_pending"] = True
-    save_session()
+        add_session_time(extra_min * 60)
+        session_state["mistress_message"] = (
+            f"You tried to escape the focus. +{extra_min} minutes."
+        )
+        session_state["last_event"] = "video_violation"
+        session_state["coyote_pulse_pending"] = True
+        bump_session_version()
+        save_session()
     return jsonify({"ok": True, "extra_min": extra_min})
 
 
 # ---------- Head tracking endpoints ----------
 
+def head_config_payload():
+    return {
+        "head_tracking_enabled": config.get("head_tracking_enabled", True),
+        "video_autopause_enabled": config.get("video_autopause_enabled", True),
+        "head_mistress_control": config.get("head_mistress_control", True),
+        "head_user_min_down_deg": config.get("head_user_min_down_deg", 20),
+        "head_user_max_down_deg": config.get("head_user_max_down_deg", 45),
+        "head_user_min_away_deg": config.get("head_user_min_away_deg", 25),
+        "head_user_max_away_deg": config.get("head_user_max_away_deg", 60),
+        "head_user_min_still_sec": config.get("head_user_min_still_sec", 5),
+        "head_user_max_still_sec": config.get("head_user_max_still_sec", 20),
+        "head_user_min_debounce_ms": config.get("head_user_min_debounce_ms", 3000),
+        "head_user_max_debounce_ms": config.get("head_user_max_debounce_ms", 7000),
+    }
+
+
 @app.route("/head_config", methods=["GET", "POST"])
 def head_config():
     global config
     if request.method == "GET":
-        return jsonify({
-            "head_tracking_enabled": config.get("head_tracking_enabled", True),
-            "video_autopause_enabled": config.get("video_autopause_enabled", True),
-            "head_mistress_control": config.get("head_mistress_control", True),
-            "head_user_min_down_deg": config.get("head_user_min_down_deg", 20),
-            "head_user_max_down_deg": config.get("head_user_max_down_deg", 45),
-            "head_user_min_away_deg": config.get("head_user_min_away_deg", 25),
-            "head_user_max_away_deg": config.get("head_user_max_away_deg", 60),
-            "head_user_min_still_sec": config.get("head_user_min_still_sec", 5),
-            "head_user_max_still_sec": config.get("head_user_max_still_sec", 20),
-            "head_user_min_debounce_ms": config.get("head_user_min_debounce_ms", 3000),
-            "head_user_max_debounce_ms": config.get("head_user_max_debounce_ms", 7000),
-        })
+        return jsonify(head_config_payload())
 
     data = request.get_json(force=True, silent=True) or {}
 
@@ -524,37 +905,33 @@ def head_config():
 def head_violation():
     """Called when headset orientation suggests looking down/away/still."""
     global session_state
-    if not session_state.get("active"):
-        return jsonify({"ok": True, "note": "No active session."})
+    with state_lock:
+        if not session_state.get("active"):
+            return jsonify({"ok": True, "note": "No active session."})
 
-    count = session_state.get("head_violation_count", 0) + 1
-    session_state["head_violation_count"] = count
-    session_state["head_thresholds"] = choose_head_thresholds(violation_count=count)
+        count = session_state.get("head_violation_count", 0) + 1
+        session_state["head_violation_count"] = count
+        session_state["head_thresholds"] = choose_head_thresholds(violation_count=count)
 
-    actions = mistress_head_punishment_choice()
+        actions = mistress_head_punishment_choice()
 
-    if config.get("hardcore_mode"):
-        if actions["add_time_min"] > 0:
-            actions["add_time_min"] += random.randint(5, 20)
-        actions["coyote_pulse"] = True
+        if config.get("hardcore_mode"):
+            if actions["add_time_min"] > 0:
+                actions["add_time_min"] += random.randint(5, 20)
+            actions["coyote_pulse"] = True
 
-    if actions["add_time_min"] > 0:
-        extra_sec = actions["add_time_min"] * 60
-        phase = session_state.get("phase", "idle")
-        if phase in ("pre_wait", "decision_hold", "punishment_delay"):
-            session_state["punishment_delay_sec"] += extra_sec
-        elif phase in ("main", "lockout"):
-            session_state["main_duration_sec"] += extra_sec
-        session_state["total_added_sec"] += extra_sec
+        if actions["add_time_min"] > 0:
+            add_session_time(actions["add_time_min"] * 60)
 
-    if actions["coyote_pulse"]:
-        session_state["coyote_pulse_pending"] = True
+        if actions["coyote_pulse"]:
+            session_state["coyote_pulse_pending"] = True
 
-    if actions["switch_video"]:
-        session_state["last_event"] = "head_video_switch"
+        if actions["switch_video"]:
+            session_state["last_event"] = "head_video_switch"
 
-    session_state["mistress_message"] = actions["message"]
-    save_session()
+        session_state["mistress_message"] = actions["message"]
+        bump_session_version()
+        save_session()
     return jsonify({"ok": True, "actions": actions})
 
 
@@ -572,77 +949,152 @@ def start_session():
     global session_state
     data = request.get_json(force=True, silent=True) or {}
 
-    if session_state.get("active"):
-        return jsonify({"error": "Session already active"}), 400
-
-    pre = int(data.get("pre_wait_sec", 0))
-    dec = int(data.get("decision_hold_sec", 0))
-    punish = int(data.get("punishment_delay_sec", 0))
-    main_min = int(data.get("main_min_sec", 30 * 60))
-    main_max = int(data.get("main_max_sec", 120 * 60))
-    if main_max < main_min:
-        main_max = main_min
-
-    main = random.randint(main_min, main_max)
-
-    reset_session()
-    now = time.time()
-    session_state["active"] = True
-    session_state["phase"] = "pre_wait" if pre > 0 else (
-        "decision_hold" if dec > 0 else (
-            "punishment_delay" if punish > 0 else "main"
+    with state_lock:
+        if session_state.get("active"):
+            return jsonify({"error": "Session already active"}), 400
+
+        pre = int(data.get("pre_wait_sec", 0))
+        dec = int(data.get("decision_hold_sec", 0))
+        punish = int(data.get("punishment_delay_sec", 0))
+        main_min = int(data.get("main_min_sec", 30 * 60))
+        main_max = int(data.get("main_max_sec", 120 * 60))
+        if main_max < main_min:
+            main_max = main_min
+
+        main = random.randint(main_min, main_max)
+
+        reset_session()
+        now = time.time()
+        session_state["active"] = True
+        session_state["phase"] = "pre_wait" if pre > 0 else (
+            "decision_hold" if dec > 0 else (
+                "punishment_delay" if punish > 0 else "main"
+            )
         )
-    )
-    session_state["start_time"] = now
-    session_state["created_at"] = now
-    session_state["pre_wait_sec"] = pre
-    session_state["decision_hold_sec"] = dec
-    session_state["punishment_delay_sec"] = punish
-    session_state["main_duration_sec"] = main
-    session_state["mistress_message"] = "Session started. Your control ends here."
-    session_state["head_violation_count"] = 0
-    session_state["head_thresholds"] = choose_head_thresholds(violation_count=0)
-
-    # Locking will occur when pre-wait ends (or immediately if pre_wait_sec == 0)
-    session_state["lock_fired"] = False
-
-    # Freeze video rules for this session
-    session_state["video_started"] = False
-    session_state["video_start_mode"] = config.get("video_start_mode", "main_phase")
-    session_state["video_start_after_sec"] = int(config.get("video_start_after_min", 0)) * 60
-
-    session_state["last_event"] = "session_started"
-    save_session()
+        session_state["start_time"] = now
+        session_state["created_at"] = now
+        session_state["pre_wait_sec"] = pre
+        session_state["decision_hold_sec"] = dec
+        session_state["punishment_delay_sec"] = punish
+        session_state["main_duration_sec"] = main
+        session_state["mistress_message"] = "Session started. Your control ends here."
+        session_state["head_violation_count"] = 0
+        session_state["head_thresholds"] = choose_head_thresholds(violation_count=0)
+
+        # Locking will occur when pre-wait ends (or immediately if pre_wait_sec == 0)
+        session_state["lock_fired"] = False
+
+        # Freeze video rules for this session
+        session_state["video_started"] = False
+        session_state["video_start_mode"] = config.get("video_start_mode", "main_phase")
+        session_state["video_start_after_sec"] = int(config.get("video_start_after_min", 0)) * 60
+
+        session_state["last_event"] = "session_started"
+        save_session()
+
+    # Import the device client now rather than inside the lock call at the
+    # end of pre-wait, where the import time would delay locking.
+    threading.Thread(target=http_client, daemon=True).start()
     return jsonify({"ok": True})
 
 
 @app.route("/abort_session", methods=["POST"])
 def abort_session():
     global session_state
-    if not session_state.get("active"):
-        return jsonify({"ok": True, "note": "No active session."})
+    with state_lock:
+        if not session_state.get("active"):
+            return jsonify({"ok": True, "note": "No active session."})
 
-    if config.get("strict_mode") or config.get("hardcore_mode"):
-        return jsonify({"error": "Abort is disabled in strict/hardcore mode."}), 403
+        if config.get("strict_mode") or config.get("hardcore_mode"):
+            return jsonify({"error": "Abort is disabled in strict/hardcore mode."}), 403
 
-    esp32_unlock()
-    reset_session()
-    session_state["last_event"] = "aborted"
-    save_session()
+        reset_session()
+        session_state["last_event"] = "aborted"
+        save_session()
+
+    # Wait for an in-flight lock request so it cannot reach the ESP32 after
+    # this unlock; later ones see the reset session and do not lock.
+    with lock_fire_guard:
+        esp32_unlock()
     return jsonify({"ok": True, "aborted": True})
 
 
-@app.route("/session_status")
-def session_status():
+def status_timing(now, phase_ends_at=None, session_ends_at=None, video_starts_at=None):
+    """
+    Absolute deadlines (epoch seconds, server clock) for local countdowns.
+    Clients derive their clock offset from server_time and re-poll when
+    state_version changes, a deadline passes, or heartbeat_sec elapses.
+    """
+    return {
+        "server_time": now,
+        "state_version": session_state.get("version", 0),
+        "phase_ends_at": phase_ends_at,
+        "session_ends_at": session_ends_at,
+        "video_starts_at": video_starts_at,
+        "heartbeat_sec": STATUS_HEARTBEAT_SEC,
+    }
+
+
+def session_status_payload(consume=True):
     """
     Compute current phase + seconds remaining based on start_time and durations.
     Also decides when to lock and when to trigger video start.
+
+    The pulse, video switch and video start are one-shot: the first consuming
+    read hands them out and clears them. Pages that only display state
+    (settings) pass consume=False, which reports any pending ones without
+    clearing them, so they still reach the session page.
+    """
+    with state_lock:
+        start = session_state.get("start_time")
+        device, payload = advance_session(time.time(), consume)
+    if device == "unlock":
+        with lock_fire_guard:
+            esp32_unlock()
+    elif device == "lock":
+        fire_session_lock(start)
+    return payload
+
+
+def fire_session_lock(start):
+    """
+    Lock once when pre-wait is over. Clients all wake at the same deadline, so
+    only one request may talk to the ESP32; the others skip and pick up
+    lock_fired on a later sync.
+    """
+    if not lock_fire_guard.acquire(blocking=False):
+        return
+    try:
+        with state_lock:
+            if session_state.get("lock_fired", False) or session_state.get("start_time") != start:
+                return
+        if not esp32_lock():
+            return
+        with state_lock:
+            # The session may have been aborted, finished or restarted meanwhile.
+            current = session_state.get("active") and session_state.get("start_time") == start
+            if current:
+                session_state["lock_fired"] = True
+                session_state["last_event"] = "locked_after_prewait"
+                save_session()
+        if not current:
+            # Its unlock may already have been sent; do not leave the device
+            # locked with no session.
+            esp32_unlock()
+    finally:
+        lock_fire_guard.release()
+
+
+def advance_session(now, consume):
+    """
+    Status payload for session_status_payload(), applying due phase changes.
+    Caller holds state_lock. Returns (device, payload) where device is
+    "lock", "unlock" or None: the ESP32 call the caller should make.
     """
     global session_state
-    now = time.time()
 
     if not session_state.get("active"):
-        return jsonify({
+        return None, {
             "active": False,
             "phase": session_state.get("phase", "idle"),
             "remaining_sec": 0,
@@ -652,7 +1104,8 @@ def session_status():
             "coyote_pulse_pending": False,
             "video_should_start": False,
             "video_display_mode": config.get("video_display_mode", "auto"),
-        })
+            **status_timing(now),
+        }
 
     pre = session_state.get("pre_wait_sec", 0)
     dec = session_state.get("decision_hold_sec", 0)
@@ -683,16 +1136,19 @@ def session_status():
     else:
         # Completed timing; handle lock_to_7am
         if config.get("lock_to_7am"):
-            now_dt = datetime.datetime.now()
+            now_dt = datetime.datetime.fromtimestamp(now)
             target = now_dt.replace(hour=7, minute=0, second=0, microsecond=0)
             if now_dt >= target:
                 target = target + datetime.timedelta(days=1)
             remaining = int((target - now_dt).total_seconds())
             if remaining > 0:
-                session_state["active"] = True
-                session_state["phase"] = "lockout"
-                save_session()
-                return jsonify({
+                if session_state.get("phase") != "lockout":
+                    session_state["active"] = True
+                    session_state["phase"] = "lockout"
+                    bump_session_version()
+                    save_session()
+                lockout_end = target.timestamp()
+                return None, {
                     "active": True,
                     "phase": "lockout",
                     "remaining_sec": remaining,
@@ -706,15 +1162,15 @@ def session_status():
                     "coyote_pulse_pending": False,
                     "video_should_start": False,
                     "video_display_mode": config.get("video_display_mode", "auto"),
-                })
+                    **status_timing(now, lockout_end, lockout_end),
+                }
 
-        phase = "finished"
         session_state["active"] = False
         session_state["phase"] = "finished"
-        esp32_unlock()
         session_state["last_event"] = "finished_unlocked"
+        bump_session_version()
         save_session()
-        return jsonify({
+        return "unlock", {
             "active": False,
             "phase": "finished",
             "remaining_sec": 0,
@@ -724,21 +1180,27 @@ def session_status():
             "coyote_pulse_pending": False,
             "video_should_start": False,
             "video_display_mode": config.get("video_display_mode", "auto"),
-        })
+            **status_timing(now),
+        }
 
     # Phase still ongoing
     remaining = max(phase_total - phase_elapsed, 0)
-    session_state["phase"] = phase
+    phase_start = start + elapsed - phase_elapsed
 
-    # Lock: fire once when pre-wait is over (or immediately if no pre-wait)
-    if not session_state.get("lock_fired", False):
-        if pre == 0 or elapsed >= pre:
-            if esp32_lock():
-                session_state["lock_fired"] = True
-                session_state["last_event"] = "locked_after_prewait"
+    # Only touch session.json when something actually changed; this endpoint
+    # is polled by every connected client.
+    changed = False
+    if session_state.get("phase") != phase:
+        session_state["phase"] = phase
+        bump_session_version()
+        changed = True
+
+    # Lock: fire once when pre-wait is over (or immediately if no pre-wait).
+    need_lock = not session_state.get("lock_fired", False) and (pre == 0 or elapsed >= pre)
 
     # Decide if video should start (once per session)
     video_should_start = False
+    video_starts_at = None
     if config.get("video_enabled", True) and not session_state.get("video_started", False):
         mode = session_state.get("video_start_mode", config.get("video_start_mode", "main_phase"))
         delay_sec = int(session_state.get("video_start_after_sec", int(config.get("video_start_after_min", 0)) * 60))
@@ -751,15 +1213,26 @@ def session_status():
         elif mode == "delayed":
             if phase == "main" and phase_elapsed >= delay_sec:
                 video_should_start = True
-
-    if video_should_start:
-        session_state["video_started"] = True
+            elif delay_sec < main:
+                video_starts_at = start + pre + dec + pun + delay_sec
 
     pulse = session_state.get("coyote_pulse_pending", False)
-    session_state["coyote_pulse_pending"] = False
-    save_session()
+    video_switch = session_state.get("video_switch_pending")
+    if consume:
+        if video_should_start:
+            session_state["video_started"] = True
+            changed = True
+        if pulse:
+            session_state["coyote_pulse_pending"] = False
+            changed = True
+        if video_switch:
+            session_state["video_switch_pending"] = None
+            changed = True
+
+    if changed:
+        save_session()
 
-    return jsonify({
+    return ("lock" if need_lock else None), {
         "active": True,
         "phase": phase,
         "remaining_sec": remaining,
@@ -771,10 +1244,163 @@ def session_status():
         "head_violation_count": session_state.get("head_violation_count", 0),
         "head_thresholds": session_state.get("head_thresholds", None),
         "coyote_pulse_pending": pulse,
+        "video_switch": video_switch,
         "video_should_start": video_should_start,
         "video_display_mode": config.get("video_display_mode", "auto"),
-    })
+        **status_timing(now, phase_start + phase_total, start + total, video_starts_at),
+    }
+
+
+@app.route("/session_status")
+def session_status():
+    # ?peek=1: read-only view that leaves one-shot events for the session page.
+    return jsonify(session_status_payload(consume=request.args.get("peek") != "1"))
+
+
+# ---------- Bootstrap ----------
+
+# Config-derived parts of /bootstrap, keyed by name. They only change when
+# save_config() runs, so they are serialised once per config_version and
+# spliced into the response as-is.
+BOOTSTRAP_CONFIG_PARTS = {
+    "config": lambda: config,
+    "head_config": head_config_payload,
+    "video_config": video_config_payload,
+    "bridge_config": bridge_config_payload,
+}
+BOOTSTRAP_PARTS = tuple(BOOTSTRAP_CONFIG_PARTS) + ("session",)
+BOOTSTRAP_GZIP_MIN_BYTES = 512
+
+# Distinguishes config versions from a previous process.
+BOOT_ID = "%x" % int(time.time())
+
+bootstrap_cache = {"version": None, "parts": {}}
+
+
+def bootstrap_config_tag():
+    return "%s-%d" % (BOOT_ID, config_version)
+
+
+def bootstrap_config_parts():
+    tag = bootstrap_config_tag()
+    if bootstrap_cache["version"] != tag:
+        bootstrap_cache["parts"] = {
+            name: json.dumps(build(), separators=(",", ":"))
+            for name, build in BOOTSTRAP_CONFIG_PARTS.items()
+        }
+        bootstrap_cache["version"] = tag
+    return bootstrap_cache["parts"]
+
+
+@app.route("/bootstrap")
+def bootstrap():
+    """
+    Everything a page needs to become interactive, in one round trip.
+
+    Query parameters:
+      parts           comma-separated subset of BOOTSTRAP_PARTS (default: all)
+      config_version  the config_version the client already holds; if it is
+                      still current the config parts are left out
+      peek            "1" to read the session part without consuming its
+                      one-shot events (see session_status_payload)
+    """
+    wanted = request.args.get("parts")
+    if wanted:
+        names = [n for n in wanted.split(",") if n in BOOTSTRAP_PARTS]
+    else:
+        names = list(BOOTSTRAP_PARTS)
+
+    tag = bootstrap_config_tag()
+    config_current = request.args.get("config_version") == tag
+    cached = bootstrap_config_parts()
+
+    fields = ['"config_version":%s' % json.dumps(tag)]
+    for name in names:
+        if name == "session":
+            consume = request.args.get("peek") != "1"
+            part = json.dumps(session_status_payload(consume=consume), separators=(",", ":"))
+        elif config_current:
+            continue
+        else:
+            part = cached[name]
+        fields.append('"%s":%s' % (name, part))
+    body = ("{" + ",".join(fields) + "}").encode("utf-8")
+
+    resp = make_response(body)
+    resp.headers["Content-Type"] = "application/json"
+    resp.headers["Cache-Control"] = "no-store"
+    resp.headers["Vary"] = "Accept-Encoding"
+    if (len(body) >= BOOTSTRAP_GZIP_MIN_BYTES
+            and "gzip" in request.headers.get("Accept-Encoding", "")):
+        resp.set_data(gzip.compress(body, compresslevel=5))
+        resp.headers["Content-Encoding"] = "gzip"
+    return resp
+
+
+# ---------- Startup ----------
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is in KiB on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def startup_report(ready_at):
+    ready_ms = (ready_at - IMPORT_STARTED) * 1000
+    rss = peak_rss_mb()
+    return {
+        "ready_ms": round(ready_ms, 1),
+        "startup_budget_ms": STARTUP_BUDGET_MS,
+        "peak_rss_mb": round(rss, 1) if rss is not None else None,
+        "rss_budget_mb": RSS_BUDGET_MB,
+        "lazy_modules_loaded": [m for m in ("requests", "voice") if m in sys.modules],
+        "within_budget": ready_ms <= STARTUP_BUDGET_MS and (rss is None or rss <= RSS_BUDGET_MB),
+    }
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Nexus backend")
+    parser.add_argument("--startup-check", action="store_true",
+                        help="load everything needed to serve, print the startup report and exit "
+                             "(non-zero if over budget)")
+    args = parser.parse_args(argv)
+
+    init_state()
+    report = startup_report(time.perf_counter())
+
+    if args.startup_check:
+        print(json.dumps(report, indent=2))
+        return 0 if report["within_budget"] else 1
+
+    print("Nexus startup: ready in %.0f ms (budget %.0f), peak RSS %s MB (budget %.0f)" % (
+        report["ready_ms"], STARTUP_BUDGET_MS, report["peak_rss_mb"], RSS_BUDGET_MB))
+    if not report["within_budget"]:
+        print("WARNING: startup over budget")
+
+    timer = threading.Timer(VOICE_WARM_DELAY_SEC, warm_voice)
+    timer.daemon = True
+    timer.start()
+
+    # HTTP/1.1 keeps connections alive, so automation scripts can pipeline
+    # /bridge_command batches without reconnecting for every call.
+    from werkzeug.serving import WSGIRequestHandler
+    WSGIRequestHandler.protocol_version = "HTTP/1.1"
+
+    # The debug reloader runs a second copy of the process; development only.
+    debug = os.environ.get("NEXUS_DEBUG", "") == "1"
+    app.run(
+        host=os.environ.get("NEXUS_HOST", "0.0.0.0"),
+        port=int(os.environ.get("NEXUS_PORT", "8080")),
+        debug=debug,
+        use_reloader=debug,
+        threaded=True,
+    )
+    return 0
 
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=int(os.environ.get("NEXUS_PORT", "8080")), debug=True)
+    sys.exit(main())
@@ -0,0 +1,399 @@
+"""
+Voice clips for mistress messages.
+
+Messages are split into fixed phrase segments and spoken numbers/times, e.g.
+
+    "You lost focus. +12 minutes added."
+    -> "You lost focus." | "plus" | "twelve" | "minutes added."
+
+Each segment is synthesised once per persona by a local engine and kept in
+a size-bounded LRU cache (memory in front of disk). A full message is then
+just a concatenation of cached WAV segments, so speaking a new variation of a
+known template takes milliseconds instead of a synthesis run.
+
+Engines:
+  - EspeakEngine: offline TTS via the espeak-ng / espeak binary.
+  - PlaceholderEngine: pure-Python tone stand-in for boards or test setups
+    without a TTS engine.
+
+NEXUS_VOICE_ENGINE selects one explicitly ("espeak", "placeholder").
+The default "auto" uses espeak if it is on PATH and otherwise reports no
+engine, so clients keep using their own speech synthesis.
+"""
+
+import io
+import os
+import re
+import math
+import wave
+import array
+import shutil
+import hashlib
+import tempfile
+import threading
+import subprocess
+from collections import OrderedDict
+
+SAMPLE_RATE = 22050
+SEGMENT_GAP_SEC = 0.06
+
+MEMORY_CACHE_BYTES = int(float(os.environ.get("NEXUS_VOICE_MEMORY_MB", "8")) * 1024 * 1024)
+DISK_CACHE_BYTES = int(float(os.environ.get("NEXUS_VOICE_DISK_MB", "64")) * 1024 * 1024)
+
+# Same shaping as speakWithBrowser() in main.js: (rate, pitch) multipliers.
+PERSONAS = {
+    "neutral": (1.0, 1.0),
+    "firm": (0.95, 0.9),
+    "playful": (1.05, 1.1),
+    "strict": (0.9, 0.85),
+}
+
+ONES = [
+    "zero", "one", "two", "three", "four", "five", "six", "seven", "eight",
+    "nine", "ten", "eleven", "twelve", "thirteen", "fourteen", "fifteen",
+    "sixteen", "seventeen", "eighteen", "nineteen",
+]
+TENS = ["", "", "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety"]
+
+# Times like 07:00 first, then signed integers like +12.
+TOKEN_RE = re.compile(r"(\d{1,2}):(\d{2})|([+-]?)(\d+)")
+
+
+def persona_params(persona):
+    return PERSONAS.get(persona, PERSONAS["neutral"])
+
+
+def resolve_persona(persona, default="neutral"):
+    """Known persona name for cache keys: persona, else default, else neutral."""
+    if persona in PERSONAS:
+        return persona
+    return default if default in PERSONAS else "neutral"
+
+
+# ---------- Text planning ----------
+
+def number_words(n):
+    if n < 20:
+        return [ONES[n]]
+    if n < 100:
+        words = [TENS[n // 10]]
+        if n % 10:
+            words.append(ONES[n % 10])
+        return words
+    # Larger values are rare in messages; read them digit by digit.
+    return [ONES[int(d)] for d in str(n)]
+
+
+def plan_segments(text):
+    """Split a message into cacheable segments (phrases and number words)."""
+    segments = []
+
+    def add_phrase(chunk):
+        chunk = " ".join(chunk.split())
+        if any(ch.isalnum() for ch in chunk):
+            segments.append(chunk)
+
+    pos = 0
+    for m in TOKEN_RE.finditer(text):
+        add_phrase(text[pos:m.start()])
+        if m.group(1) is not None:
+            hour, minute = int(m.group(1)), int(m.group(2))
+            segments.extend(number_words(hour))
+            segments.extend(["o'clock"] if minute == 0 else number_words(minute))
+        else:
+            sign = m.group(3)
+            if sign == "+":
+                segments.append("plus")
+            elif sign == "-":
+                segments.append("minus")
+            segments.extend(number_words(int(m.group(4))))
+        pos = m.end()
+    add_phrase(text[pos:])
+    return segments
+
+
+# ---------- WAV helpers ----------
+
+def wav_bytes(samples, rate=SAMPLE_RATE):
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(samples.tobytes())
+    return buf.getvalue()
+
+
+def concat_wavs(clips, gap_sec=SEGMENT_GAP_SEC):
+    """Join WAV clips that share one format, with a short silence between."""
+    params = None
+    frames = []
+    for clip in clips:
+        with wave.open(io.BytesIO(clip), "rb") as w:
+            p = (w.getnchannels(), w.getsampwidth(), w.getframerate())
+            if params is None:
+                params = p
+            elif p != params:
+                raise ValueError("Clip formats differ: %r vs %r" % (p, params))
+            frames.append(w.readframes(w.getnframes()))
+    if params is None:
+        return b""
+
+    channels, width, rate = params
+    gap = b"\x00" * (int(rate * gap_sec) * channels * width)
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(width)
+        w.setframerate(rate)
+        w.writeframes(gap.join(frames))
+    return buf.getvalue()
+
+
+# ---------- Engines ----------
+
+class PlaceholderEngine:
+    """Speaks each word as a short tone. Deterministic and dependency-free."""
+
+    name = "placeholder"
+
+    def synthesize(self, text, persona):
+        rate, pitch = persona_params(persona)
+        word_sec = 0.16 / rate
+        gap = array.array("h", [0]) * int(SAMPLE_RATE * 0.04 / rate)
+        samples = array.array("h")
+        for word in text.split():
+            seed = int(hashlib.md5(word.lower().encode("utf-8")).hexdigest()[:4], 16)
+            freq = (180 + seed % 140) * pitch
+            n = int(SAMPLE_RATE * word_sec)
+            for i in range(n):
+                env = min(1.0, i / 200.0, (n - i) / 200.0)
+                samples.append(int(9000 * env * math.sin(2 * math.pi * freq * i / SAMPLE_RATE)))
+            samples.extend(gap)
+        return wav_bytes(samples)
+
+
+class EspeakEngine:
+    """Offline TTS through the espeak-ng (or espeak) command line tool."""
+
+    name = "espeak"
+
+    def __init__(self, binary):
+        self.binary = binary
+
+    def synthesize(self, text, persona):
+        rate, pitch = persona_params(persona)
+        fd, path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        try:
+            # Text goes in on stdin, never argv: a message such as
+            # "-w/some/file" must not be read as an option.
+            subprocess.run(
+                [self.binary, "-v", "en", "-s", str(int(170 * rate)),
+                 "-p", str(int(50 * pitch)), "-w", path, "--stdin"],
+                input=text.encode("utf-8"), check=True, timeout=30,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            with open(path, "rb") as f:
+                return f.read()
+        finally:
+            os.unlink(path)
+
+
+def make_engine(name=None):
+    """Return the configured engine, or None if no real TTS is available."""
+    name = name or os.environ.get("NEXUS_VOICE_ENGINE", "auto")
+    if name == "placeholder":
+        return PlaceholderEngine()
+    binary = shutil.which("espeak-ng") or shutil.which("espeak")
+    if binary:
+        return EspeakEngine(binary)
+    print("Voice: no espeak-ng/espeak found; server voice clips disabled.")
+    return None
+
+
+# ---------- Cache ----------
+
+class ClipCache:
+    """
+    Two-level LRU of WAV clips: a byte-bounded dict in memory in front of a
+    byte-bounded directory on disk. Disk recency is tracked via file mtime so
+    it survives restarts.
+    """
+
+    def __init__(self, directory, memory_bytes=MEMORY_CACHE_BYTES, disk_bytes=DISK_CACHE_BYTES):
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.memory = OrderedDict()
+        self.memory_used = 0
+        self.disk = OrderedDict()
+        self.disk_used = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        entries = []
+        for fname in os.listdir(directory):
+            if fname.endswith(".wav"):
+                st = os.stat(os.path.join(directory, fname))
+                entries.append((st.st_mtime, fname[:-4], st.st_size))
+        for _, key, size in sorted(entries):
+            self.disk[key] = size
+            self.disk_used += size
+        # The budget may have shrunk since the last run.
+        self._trim_disk()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".wav")
+
+    def get(self, key):
+        with self._lock:
+            data = self.memory.get(key)
+            if data is not None:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return data
+            if key not in self.disk:
+                self.misses += 1
+                return None
+            try:
+                with open(self._path(key), "rb") as f:
+                    data = f.read()
+                os.utime(self._path(key))
+            except OSError:
+                self.disk_used -= self.disk.pop(key)
+                self.misses += 1
+                return None
+            self.disk.move_to_end(key)
+            self._remember(key, data)
+            self.hits += 1
+            return data
+
+    def put(self, key, data, persist=True):
+        with self._lock:
+            self._remember(key, data)
+            if not persist or key in self.disk or len(data) > self.disk_bytes:
+                return
+            try:
+                with open(self._path(key), "wb") as f:
+                    f.write(data)
+            except OSError as e:
+                print("Voice cache write failed:", e)
+                return
+            self.disk[key] = len(data)
+            self.disk_used += len(data)
+            self._trim_disk()
+
+    def _trim_disk(self):
+        while self.disk_used > self.disk_bytes and self.disk:
+            old, size = self.disk.popitem(last=False)
+            self.disk_used -= size
+            try:
+                os.unlink(self._path(old))
+            except OSError:
+                pass
+
+    def _remember(self, key, data):
+        if len(data) > self.memory_bytes:
+            return
+        if key in self.memory:
+            self.memory_used -= len(self.memory.pop(key))
+        self.memory[key] = data
+        self.memory_used += len(data)
+        while self.memory_used > self.memory_bytes and self.memory:
+            _, old = self.memory.popitem(last=False)
+            self.memory_used -= len(old)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "memory_clips": len(self.memory),
+                "memory_bytes": self.memory_used,
+                "memory_limit": self.memory_bytes,
+                "disk_clips": len(self.disk),
+                "disk_bytes": self.disk_used,
+                "disk_limit": self.disk_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# ---------- Voice ----------
+
+class Voice:
+    def __init__(self, engine, cache):
+        self.engine = engine
+        self.cache = cache
+        self._synth_lock = threading.Lock()
+        self._warm_lock = threading.Lock()
+
+    def _key(self, kind, persona, text):
+        raw = "%s|%s|%s|%s" % (self.engine.name, kind, persona, text)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def segment(self, text, persona):
+        key = self._key("seg", persona, text)
+        data = self.cache.get(key)
+        if data is not None:
+            return data
+        # One synthesis at a time: the engine is CPU bound on small boards and
+        # a second request for the same segment should wait for the first.
+        with self._synth_lock:
+            data = self.cache.get(key)
+            if data is None:
+                data = self.engine.synthesize(text, persona)
+                self.cache.put(key, data)
+        return data
+
+    def clip_tag(self, text, persona):
+        """Validator for clip(): changes with the engine, text and persona."""
+        return self._key("msg", resolve_persona(persona), text)
+
+    def clip(self, text, persona):
+        """Full WAV for a message, assembled from cached segments."""
+        # Unknown names would sound like neutral but fill the cache under
+        # their own keys.
+        persona = resolve_persona(persona)
+        key = self._key("msg", persona, text)
+        data = self.cache.get(key)
+        if data is not None:
+            return data
+        segments = plan_segments(text)
+        if not segments:
+            return b""
+        try:
+            data = concat_wavs([self.segment(s, persona) for s in segments])
+        except ValueError:
+            data = self.engine.synthesize(text, persona)
+        # Assembled messages are cheap to rebuild; keep them out of the disk budget.
+        self.cache.put(key, data, persist=False)
+        return data
+
+    def warm(self, phrases, persona, numbers=range(100)):
+        """Pre-synthesise every segment the given phrases and numbers need."""
+        persona = resolve_persona(persona)
+        with self._warm_lock:
+            needed = []
+            for phrase in phrases:
+                needed.extend(plan_segments(phrase))
+            for n in numbers:
+                needed.extend(number_words(n))
+            needed.extend(["plus", "minus", "o'clock"])
+            for seg in OrderedDict.fromkeys(needed):
+                try:
+                    self.segment(seg, persona)
+                except Exception as e:
+                    print("Voice warm-up failed for %r: %s" % (seg, e))
+                    return
+
+    def warm_async(self, phrases, persona):
+        t = threading.Thread(target=self.warm, args=(list(phrases), persona), daemon=True)
+        t.start()
+        return t
+
+    def stats(self):
+        stats = {"engine": self.engine.name}
+        stats.update(self.cache.stats())
+        return stats
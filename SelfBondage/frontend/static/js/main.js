@@ -18,17 +18,25 @@ let headViolationPending = false;
 
 let strictOrHardcore = false;
 
+// Status sync: the countdown runs locally from server deadlines and we only
+// re-fetch /session_status at phase boundaries, after our own actions, or on
+// the server-provided heartbeat.
+let statusVersion = null;
+let serverOffsetMs = 0;      // server clock minus local clock
+let phaseEndsAtMs = null;    // server clock, ms
+let statusSyncTimer = null;
+let statusSyncInFlight = false;
+let statusSyncQueued = false;
+
 let voiceEnabled = false;
 let voicePersona = "neutral";
 let lastSpokenMessage = "";
+let serverVoiceAvailable = true;
+let voiceAudio = null;
+const VOICE_MAX_TEXT = 300;  // /voice_clip rejects longer text
 
-function speakLine(text) {
-  if (!voiceEnabled) return;
+function speakWithBrowser(text) {
   if (!('speechSynthesis' in window)) return;
-  if (!text) return;
-  if (text === lastSpokenMessage) return;
-
-  lastSpokenMessage = text;
 
   const utter = new SpeechSynthesisUtterance(text);
   if (voicePersona === "firm") {
@@ -46,6 +54,57 @@ function speakLine(text) {
   window.speechSynthesis.speak(utter);
 }
 
+// A failed clip only means this line is spoken by the browser. Server voice
+// is switched off for the page's lifetime only once /voice_status confirms
+// there is no engine (the 503 case).
+async function checkServerVoice() {
+  try {
+    const res = await fetch("/voice_status");
+    const data = await res.json();
+    if (!data.engine) {
+      console.log("No server voice engine, using browser speech.");
+      serverVoiceAvailable = false;
+    }
+  } catch (e) {
+    // Network trouble: keep trying the server for later lines.
+  }
+}
+
+// Server clips are assembled from pre-synthesised segments, so they start
+// almost immediately; the browser's speechSynthesis is the fallback.
+function speakWithServer(text) {
+  if (voiceAudio) {
+    voiceAudio.pause();
+  }
+  const url = "/voice_clip?persona=" + encodeURIComponent(voicePersona) +
+    "&text=" + encodeURIComponent(text);
+  const audio = new Audio(url);
+  voiceAudio = audio;
+  audio.addEventListener("error", () => {
+    if (voiceAudio === audio) speakWithBrowser(text);
+    checkServerVoice();
+  });
+  audio.play().catch((err) => {
+    if (err && err.name === "NotAllowedError") {
+      speakWithBrowser(text);
+    }
+  });
+}
+
+function speakLine(text) {
+  if (!voiceEnabled) return;
+  if (!text) return;
+  if (text === lastSpokenMessage) return;
+
+  lastSpokenMessage = text;
+
+  if (serverVoiceAvailable && text.length <= VOICE_MAX_TEXT) {
+    speakWithServer(text);
+  } else {
+    speakWithBrowser(text);
+  }
+}
+
 function fmtTime(sec) {
   sec = Math.max(0, Math.floor(sec));
   const m = Math.floor(sec / 60);
@@ -83,6 +142,7 @@ async function startSession() {
       const line = "Session has begun. You don't touch the controls anymore.";
       document.getElementById("mistressText").innerText = line;
       speakLine(line);
+      requestStatusSync();
     }
   } catch (e) {
     alert("Failed to start session: " + e);
@@ -108,6 +168,7 @@ async function abortSession() {
       document.getElementById("mistressText").innerText = line;
       speakLine(line);
       closeAnyVideo();
+      requestStatusSync();
     }
   } catch (e) {
     console.log("Abort error:", e);
@@ -132,59 +193,157 @@ function closeAnyVideo() {
   videoPopup = null;
 }
 
-async function pollSessionStatus() {
-  try {
-    const res = await fetch("/session_status");
-    const data = await res.json();
+function serverNowMs() {
+  return Date.now() + serverOffsetMs;
+}
 
-    document.getElementById("phase").innerText = data.phase || "idle";
-    document.getElementById("timeRemaining").innerText = fmtTime(data.remaining_sec || 0);
-    document.getElementById("headCount").innerText = data.head_violation_count || 0;
+function renderCountdown() {
+  if (phaseEndsAtMs === null) return;
+  const remaining = (phaseEndsAtMs - serverNowMs()) / 1000;
+  document.getElementById("timeRemaining").innerText = fmtTime(Math.ceil(remaining));
+}
 
-    if (data.mistress_message) {
-      const text = data.mistress_message;
-      document.getElementById("mistressText").innerText = text;
-      speakLine(text);
+function scheduleStatusSync(data) {
+  let waitMs = (data.heartbeat_sec || 15) * 1000;
+  const now = serverNowMs();
+  [data.phase_ends_at, data.video_starts_at].forEach((t) => {
+    if (typeof t === "number") {
+      // Land just after the deadline so the server sees it as passed, with a
+      // little jitter so every open tab does not hit it in the same instant.
+      waitMs = Math.min(waitMs, t * 1000 - now + 250 + Math.random() * 500);
     }
+  });
+  waitMs = Math.max(250, waitMs);
+  clearTimeout(statusSyncTimer);
+  statusSyncTimer = setTimeout(syncSessionStatus, waitMs);
+}
 
-    if (data.active) {
-      document.getElementById("btnStart").disabled = true;
-    } else {
-      document.getElementById("btnStart").disabled = false;
-    }
+function requestStatusSync() {
+  clearTimeout(statusSyncTimer);
+  syncSessionStatus();
+}
 
-    if (data.head_thresholds) {
-      const ht = data.head_thresholds;
-      if (ht.down_deg) downAngleDeg = ht.down_deg;
-      if (ht.away_deg) awayAngleDeg = ht.away_deg;
-      if (ht.still_sec) stillnessMs = ht.still_sec * 1000;
-      if (ht.debounce_ms) headDebounceMs = ht.debounce_ms;
-    }
+function applySessionState(data) {
+  document.getElementById("phase").innerText = data.phase || "idle";
+  document.getElementById("headCount").innerText = data.head_violation_count || 0;
 
-    if (data.coyote_pulse_pending) {
-      console.log("Pulse flag set (generic marker).");
-    }
+  if (data.mistress_message) {
+    const text = data.mistress_message;
+    document.getElementById("mistressText").innerText = text;
+    speakLine(text);
+  }
 
-    if (typeof data.video_display_mode === "string") {
-      videoDisplayMode = data.video_display_mode || "auto";
-    }
+  if (data.active) {
+    document.getElementById("btnStart").disabled = true;
+  } else {
+    document.getElementById("btnStart").disabled = false;
+  }
 
-    if (data.video_should_start && videoModeEnabled && !punishOverlayActive) {
-      startPunishmentVideo();
-    }
+  if (data.head_thresholds) {
+    const ht = data.head_thresholds;
+    if (ht.down_deg) downAngleDeg = ht.down_deg;
+    if (ht.away_deg) awayAngleDeg = ht.away_deg;
+    if (ht.still_sec) stillnessMs = ht.still_sec * 1000;
+    if (ht.debounce_ms) headDebounceMs = ht.debounce_ms;
+  }
 
+  if (typeof data.video_display_mode === "string") {
+    videoDisplayMode = data.video_display_mode || "auto";
+  }
+}
+
+function handleSessionStatus(data, sentAt, receivedAt) {
+  if (typeof data.server_time === "number") {
+    serverOffsetMs = data.server_time * 1000 - (sentAt + receivedAt) / 2;
+  }
+
+  if (data.state_version !== statusVersion) {
+    statusVersion = data.state_version;
+    applySessionState(data);
+  }
+
+  if (typeof data.phase_ends_at === "number") {
+    phaseEndsAtMs = data.phase_ends_at * 1000;
+    renderCountdown();
+  } else {
+    phaseEndsAtMs = null;
+    document.getElementById("timeRemaining").innerText = fmtTime(data.remaining_sec || 0);
+  }
+
+  if (data.coyote_pulse_pending) {
+    console.log("Pulse flag set (generic marker).");
+  }
+
+  if (data.video_switch && videoModeEnabled) {
+    closeAnyVideo();
+    startPunishmentVideo(data.video_switch.url);
+  } else if (data.video_should_start && videoModeEnabled && !punishOverlayActive) {
+    startPunishmentVideo();
+  }
+}
+
+async function syncSessionStatus() {
+  if (statusSyncInFlight) {
+    statusSyncQueued = true;
+    return;
+  }
+  statusSyncInFlight = true;
+  let data = null;
+  try {
+    const sentAt = Date.now();
+    const res = await fetch("/session_status");
+    data = await res.json();
+    handleSessionStatus(data, sentAt, Date.now());
   } catch (e) {
-    console.log("pollSessionStatus error:", e);
+    console.log("syncSessionStatus error:", e);
   } finally {
-    setTimeout(pollSessionStatus, 1000);
+    statusSyncInFlight = false;
+    if (statusSyncQueued) {
+      statusSyncQueued = false;
+      syncSessionStatus();
+    } else if (data) {
+      scheduleStatusSync(data);
+    } else {
+      clearTimeout(statusSyncTimer);
+      statusSyncTimer = setTimeout(syncSessionStatus, 5000);
+    }
+  }
+}
+
+function applyVideoConfig(data) {
+  videoModeEnabled = !!data.video_enabled;
+}
+
+function applyHeadModeConfig(data) {
+  headTrackingEnabled = !!data.head_tracking_enabled;
+  videoAutopauseEnabled = !!data.video_autopause_enabled;
+  if (headTrackingEnabled) {
+    initHeadTracking();
+  }
+}
+
+function applySessionConfigModes(data) {
+  strictOrHardcore = !!(data.strict_mode || data.hardcore_mode);
+
+  voiceEnabled = !!data.voice_enabled;
+  voicePersona = data.voice_persona || "neutral";
+
+  const abortBtn = document.getElementById("btnAbort");
+  if (abortBtn) {
+    if (strictOrHardcore) {
+      abortBtn.disabled = true;
+      abortBtn.textContent = "Abort disabled (strict/hardcore)";
+    } else {
+      abortBtn.disabled = false;
+      abortBtn.textContent = "Abort (testing only)";
+    }
   }
 }
 
 async function loadVideoConfig() {
   try {
     const res = await fetch("/video_config");
-    const data = await res.json();
-    videoModeEnabled = !!data.video_enabled;
+    applyVideoConfig(await res.json());
   } catch (e) {
     console.log("loadVideoConfig error:", e);
   }
@@ -193,12 +352,7 @@ async function loadVideoConfig() {
 async function loadHeadModeConfig() {
   try {
     const res = await fetch("/head_config");
-    const data = await res.json();
-    headTrackingEnabled = !!data.head_tracking_enabled;
-    videoAutopauseEnabled = !!data.video_autopause_enabled;
-    if (headTrackingEnabled) {
-      initHeadTracking();
-    }
+    applyHeadModeConfig(await res.json());
   } catch (e) {
     console.log("loadHeadModeConfig error:", e);
   }
@@ -207,27 +361,34 @@ async function loadHeadModeConfig() {
 async function loadSessionConfigModes() {
   try {
     const res = await fetch("/config");
-    const data = await res.json();
-    strictOrHardcore = !!(data.strict_mode || data.hardcore_mode);
-
-    voiceEnabled = !!data.voice_enabled;
-    voicePersona = data.voice_persona || "neutral";
-
-    const abortBtn = document.getElementById("btnAbort");
-    if (abortBtn) {
-      if (strictOrHardcore) {
-        abortBtn.disabled = true;
-        abortBtn.textContent = "Abort disabled (strict/hardcore)";
-      } else {
-        abortBtn.disabled = false;
-        abortBtn.textContent = "Abort (testing only)";
-      }
-    }
+    applySessionConfigModes(await res.json());
   } catch (e) {
     console.log("loadSessionConfigModes error:", e);
   }
 }
 
+// One request for config + head + video + session state at page load.
+// Falls back to the individual endpoints if /bootstrap is unavailable.
+async function loadBootstrap() {
+  try {
+    const sentAt = Date.now();
+    const res = await fetch("/bootstrap?parts=config,head_config,video_config,session");
+    if (!res.ok) throw new Error(res.statusText);
+    const data = await res.json();
+    const receivedAt = Date.now();
+
+    applyVideoConfig(data.video_config);
+    applyHeadModeConfig(data.head_config);
+    applySessionConfigModes(data.config);
+    handleSessionStatus(data.session, sentAt, receivedAt);
+    scheduleStatusSync(data.session);
+  } catch (e) {
+    console.log("loadBootstrap error, loading individually:", e);
+    await Promise.all([loadVideoConfig(), loadHeadModeConfig(), loadSessionConfigModes()]);
+    syncSessionStatus();
+  }
+}
+
 function openVideoPopup(url) {
   const width = Math.floor(window.screen.width * 0.8);
   const height = Math.floor(window.screen.height * 0.8);
@@ -257,16 +418,19 @@ function openVideoPopup(url) {
   }, 1000);
 }
 
-async function startPunishmentVideo() {
+async function startPunishmentVideo(requestedUrl) {
   if (!videoModeEnabled || punishOverlayActive) return;
   try {
-    const res = await fetch("/video_random");
-    const data = await res.json();
-    if (!res.ok || data.error) {
-      console.log("No focus video:", data.error || res.statusText);
-      return;
+    let url = requestedUrl;
+    if (!url) {
+      const res = await fetch("/video_random");
+      const data = await res.json();
+      if (!res.ok || data.error) {
+        console.log("No focus video:", data.error || res.statusText);
+        return;
+      }
+      url = data.url;
     }
-    const url = data.url;
 
     if (videoDisplayMode === "popup") {
       openVideoPopup(url);
@@ -321,6 +485,7 @@ async function userTriedClosePunish() {
         document.getElementById("mistressText").innerText = line;
         speakLine(line);
       }
+      requestStatusSync();
     } else {
       console.log("video_violation error:", data.error || res.statusText);
     }
@@ -392,6 +557,7 @@ async function triggerHeadViolation(lookingDown, lookingAway, tooStill) {
         closeAnyVideo();
         startPunishmentVideo();
       }
+      requestStatusSync();
     } else {
       console.log("head_violation error:", data.error || res.statusText);
     }
@@ -406,8 +572,6 @@ async function triggerHeadViolation(lookingDown, lookingAway, tooStill) {
 }
 
 document.addEventListener("DOMContentLoaded", () => {
-  loadVideoConfig();
-  loadHeadModeConfig();
-  loadSessionConfigModes();
-  pollSessionStatus();
+  loadBootstrap();
+  setInterval(renderCountdown, 250);
 });
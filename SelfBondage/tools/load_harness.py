@@ -0,0 +1,567 @@
+"""
+End-to-end load harness for Nexus.
+
+Starts local stand-ins for the ESP32 lock controller and the external bridge,
+launches the backend against them with a throwaway config directory and then
+drives full session lifecycles while many simulated clients poll
+/session_status.
+
+Usage (from the SelfBondage directory):
+
+    python tools/load_harness.py --cycles 4 --clients 25
+    python tools/load_harness.py --esp32-hang-rate 0.3 --esp32-error-rate 0.2
+    python tools/load_harness.py --poll-mode deadline --clients 50
+    python tools/load_harness.py --json /tmp/nexus_load.json
+
+Two kinds of cycle alternate:
+  - clean cycles run to natural completion, so lock and unlock timing can be
+    compared with the schedule the session was started with;
+  - burst cycles fire a volley of head/video violations and pipelined
+    /bridge_command batches once the lock has fired and then abort the
+    session (both add minutes of time).
+
+The report covers per-endpoint throughput and tail latency, device call
+outcomes and lock/unlock timing error.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+TOOLS_DIR = os.path.abspath(os.path.dirname(__file__))
+ROOT_DIR = os.path.dirname(TOOLS_DIR)
+BACKEND_DIR = os.path.join(ROOT_DIR, "backend")
+COMMAND_TOKEN = "harness-token"
+
+
+# ---------- Fake devices ----------
+
+class FakeDevice:
+    """
+    A tiny HTTP server standing in for the ESP32 or the bridge endpoint.
+    Every request is recorded as (received_at, finished_at, method, path, outcome).
+    """
+
+    def __init__(self, name, latency_ms=0, jitter_ms=0, error_rate=0.0,
+                 error_mode="drop", hang_rate=0.0, hang_sec=10.0):
+        self.name = name
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_mode = error_mode
+        self.hang_rate = hang_rate
+        self.hang_sec = hang_sec
+        self.events = []
+        self._lock = threading.Lock()
+
+        device = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                device._handle(self)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0) or 0)
+                if length:
+                    self.rfile.read(length)
+                device._handle(self)
+
+            def log_message(self, fmt, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:%d" % self.server.server_address[1]
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _record(self, received, method, path, outcome):
+        with self._lock:
+            self.events.append((received, time.time(), method, path, outcome))
+
+    def _handle(self, handler):
+        received = time.time()
+        roll = random.random()
+
+        if roll < self.hang_rate:
+            time.sleep(self.hang_sec)
+            outcome = "hang"
+        elif roll < self.hang_rate + self.error_rate:
+            outcome = "error"
+        else:
+            outcome = "ok"
+
+        delay = self.latency_ms + random.uniform(0, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+        self._record(received, handler.command, handler.path, outcome)
+
+        if outcome == "error" and self.error_mode == "drop":
+            handler.close_connection = True
+            return
+
+        status = 500 if outcome == "error" else 200
+        body = ("%s %s %s" % (self.name, handler.path.strip("/").upper(), outcome)).encode()
+        try:
+            handler.send_response(status)
+            handler.send_header("Content-Type", "text/plain")
+            handler.send_header("Content-Length", str(len(body)))
+            handler.end_headers()
+            handler.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # Nexus gave up waiting (its device timeout is shorter than a hang).
+            pass
+
+    def events_between(self, start, end, path=None):
+        with self._lock:
+            return [
+                e for e in self.events
+                if start <= e[0] <= end and (path is None or e[3] == path)
+            ]
+
+
+# ---------- Measurements ----------
+
+class Stats:
+    """Thread-safe latency / status collector keyed by endpoint label."""
+
+    def __init__(self):
+        self.samples = {}
+        self.statuses = {}
+        self.failures = {}
+        self._lock = threading.Lock()
+
+    def record(self, label, seconds, status):
+        with self._lock:
+            self.samples.setdefault(label, []).append(seconds)
+            counts = self.statuses.setdefault(label, {})
+            counts[status] = counts.get(status, 0) + 1
+
+    def record_failure(self, label, seconds, exc):
+        with self._lock:
+            self.samples.setdefault(label, []).append(seconds)
+            counts = self.failures.setdefault(label, {})
+            key = type(exc).__name__
+            counts[key] = counts.get(key, 0) + 1
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile; values need not be sorted."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[k]
+
+
+def timed_call(stats, http, label, method, url, timeout=15, **kwargs):
+    """Run one HTTP call, recording its latency. Returns (response or None)."""
+    t0 = time.perf_counter()
+    try:
+        r = http.request(method, url, timeout=timeout, **kwargs)
+    except Exception as e:
+        stats.record_failure(label, time.perf_counter() - t0, e)
+        return None
+    stats.record(label, time.perf_counter() - t0, r.status_code)
+    return r
+
+
+# ---------- Nexus process ----------
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def write_config(config_dir, esp32, bridge):
+    cfg = {
+        "esp32_url": esp32.url,
+        "external_bridge_enabled": True,
+        "external_bridge_url": bridge.url + "/hook",
+        "bridge_commands_enabled": True,
+        "bridge_command_token": COMMAND_TOKEN,
+        "strict_mode": False,
+        "hardcore_mode": False,
+        "lock_to_7am": False,
+        "head_tracking_enabled": True,
+        "video_enabled": True,
+        "video_urls": ["https://example.invalid/focus.mp4"],
+    }
+    with open(os.path.join(config_dir, "config.json"), "w") as f:
+        json.dump(cfg, f, indent=2)
+
+
+def launch_nexus(port, config_dir, log_path):
+    """Start the production entry point; returns (process, base url, seconds to first response)."""
+    env = dict(os.environ)
+    env["NEXUS_CONFIG_DIR"] = config_dir
+    env["NEXUS_HOST"] = "127.0.0.1"
+    env["NEXUS_PORT"] = str(port)
+    env.pop("NEXUS_DEBUG", None)
+    log = open(log_path, "w")
+    t0 = time.time()
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(BACKEND_DIR, "app.py")],
+        cwd=ROOT_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    base = "http://127.0.0.1:%d" % port
+    deadline = time.time() + 20
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            break
+        try:
+            requests.get(base + "/session_status", timeout=1)
+            return proc, base, time.time() - t0
+        except requests.RequestException:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError("Nexus did not start; see %s" % log_path)
+
+
+# ---------- Load drivers ----------
+
+def next_poll_delay(data, interval, mode):
+    """
+    fixed: poll every interval (the pre-deadline client behaviour).
+    deadline: follow the /session_status contract like main.js does and wake
+    at the next phase/video deadline or the server heartbeat.
+    """
+    if mode == "fixed" or data is None:
+        return interval
+    wait = float(data.get("heartbeat_sec") or interval)
+    server_now = data.get("server_time", time.time())
+    for key in ("phase_ends_at", "video_starts_at"):
+        t = data.get(key)
+        if isinstance(t, (int, float)):
+            wait = min(wait, t - server_now + 0.25)
+    return max(0.25, wait)
+
+
+def poller(base, stats, interval, mode, stop, last_seen, wake=None):
+    """
+    One simulated client. The acting client (the one that starts sessions and
+    reports violations) gets a wake event and re-syncs right after each action,
+    as main.js does.
+    """
+    http = requests.Session()
+    # Spread the clients out instead of polling in lock-step.
+    time.sleep(random.uniform(0, interval))
+    while not stop.is_set():
+        data = None
+        r = timed_call(stats, http, "session_status", "GET", base + "/session_status")
+        if r is not None and r.ok:
+            try:
+                data = r.json()
+                last_seen["phase"] = data.get("phase")
+                last_seen["active"] = data.get("active")
+            except ValueError:
+                stats.record_failure("session_status", 0.0, ValueError("bad json"))
+        delay = next_poll_delay(data, interval, mode)
+        if wake is None:
+            stop.wait(delay)
+        else:
+            wake.wait(delay)
+            wake.clear()
+
+
+def violation_burst(base, stats, size, video_share):
+    def fire():
+        http = requests.Session()
+        if random.random() < video_share:
+            timed_call(stats, http, "video_violation", "POST", base + "/video_violation")
+        else:
+            timed_call(stats, http, "head_violation", "POST", base + "/head_violation")
+
+    threads = [threading.Thread(target=fire) for _ in range(size)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def command_batches(base, stats, batches, size):
+    """Pipeline /bridge_command batches over one keep-alive connection."""
+    http = requests.Session()
+    kinds = ("add_time", "pulse", "switch_video", "set_message")
+    for b in range(batches):
+        actions = []
+        for i in range(size):
+            kind = random.choice(kinds)
+            action = {"type": kind, "id": "%d.%d" % (b, i)}
+            if kind == "add_time":
+                action["minutes"] = random.randint(1, 5)
+            elif kind == "set_message":
+                action["message"] = "Harness batch %d." % b
+            actions.append(action)
+        timed_call(stats, http, "bridge_command", "POST", base + "/bridge_command",
+                   json={"actions": actions}, headers={"X-Bridge-Token": COMMAND_TOKEN})
+
+
+def wait_for(predicate, timeout, step=0.05):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(step)
+    return False
+
+
+def run_cycle(index, burst, args, base, stats, esp32, bridge, last_seen, wake):
+    http = requests.Session()
+    payload = {
+        "pre_wait_sec": args.pre_wait,
+        "decision_hold_sec": 0,
+        "punishment_delay_sec": 0,
+        "main_min_sec": args.main,
+        "main_max_sec": args.main,
+    }
+
+    t_send = time.time()
+    r = timed_call(stats, http, "start_session", "POST", base + "/start_session", json=payload)
+    t_recv = time.time()
+    if r is None or not r.ok:
+        return {"cycle": index, "kind": "burst" if burst else "clean", "error": "start failed"}
+    # Nexus stamps start_time somewhere inside the request.
+    t_start = (t_send + t_recv) / 2.0
+    wake.set()
+    expected_lock = t_start + args.pre_wait
+
+    for _ in range(args.bridge_tests):
+        timed_call(stats, http, "bridge_test", "POST", base + "/bridge_test")
+
+    result = {"cycle": index, "kind": "burst" if burst else "clean"}
+    slack = args.hang_sec + 10
+
+    if burst:
+        wait_for(lambda: esp32.events_between(t_send, time.time() + 1, "/lock"),
+                 args.pre_wait + slack)
+        violation_burst(base, stats, args.burst_size, args.video_share)
+        command_batches(base, stats, args.command_batches, args.command_size)
+        wake.set()
+        expected_unlock = time.time()
+        timed_call(stats, http, "abort_session", "POST", base + "/abort_session")
+    else:
+        expected_unlock = t_start + args.pre_wait + args.main
+        wait_for(lambda: time.time() >= expected_unlock and last_seen.get("active") is False,
+                 args.pre_wait + args.main + slack)
+
+    t_end = time.time() + 0.5
+    time.sleep(0.5)
+
+    locks = esp32.events_between(t_send, t_end, "/lock")
+    unlocks = esp32.events_between(t_send, t_end, "/unlock")
+    ok_locks = [e for e in locks if e[4] == "ok"]
+    ok_unlocks = [e for e in unlocks if e[4] == "ok"]
+
+    result["lock_calls"] = len(locks)
+    result["unlock_calls"] = len(unlocks)
+    result["lock_error_sec"] = (ok_locks[0][0] - expected_lock) if ok_locks else None
+    result["unlock_error_sec"] = (ok_unlocks[0][0] - expected_unlock) if ok_unlocks else None
+    result["bridge_calls"] = len(bridge.events_between(t_send, t_end))
+
+    # Leave the backend idle for the next cycle regardless of outcome.
+    if last_seen.get("active"):
+        timed_call(stats, http, "abort_session", "POST", base + "/abort_session")
+    wake.set()
+    return result
+
+
+# ---------- Reporting ----------
+
+def build_report(stats, cycles, esp32, bridge, wall):
+    endpoints = {}
+    for label, values in sorted(stats.samples.items()):
+        endpoints[label] = {
+            "count": len(values),
+            "rps": len(values) / wall if wall else 0.0,
+            "p50_ms": percentile(values, 50) * 1000,
+            "p90_ms": percentile(values, 90) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+            "max_ms": max(values) * 1000 if values else 0.0,
+            "statuses": stats.statuses.get(label, {}),
+            "failures": stats.failures.get(label, {}),
+        }
+
+    def outcomes(device):
+        counts = {}
+        for e in device.events:
+            key = "%s %s" % (e[3], e[4])
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    lock_errors = [c["lock_error_sec"] for c in cycles if c.get("lock_error_sec") is not None]
+    unlock_errors = [c["unlock_error_sec"] for c in cycles if c.get("unlock_error_sec") is not None]
+
+    return {
+        "wall_sec": wall,
+        "total_requests": sum(e["count"] for e in endpoints.values()),
+        "throughput_rps": sum(e["count"] for e in endpoints.values()) / wall if wall else 0.0,
+        "endpoints": endpoints,
+        "esp32": outcomes(esp32),
+        "bridge": outcomes(bridge),
+        "timing": {
+            "lock_error_p50_sec": percentile(lock_errors, 50),
+            "lock_error_max_sec": max(lock_errors) if lock_errors else None,
+            "unlock_error_p50_sec": percentile(unlock_errors, 50),
+            "unlock_error_max_sec": max(unlock_errors) if unlock_errors else None,
+            "cycles_without_lock": sum(1 for c in cycles if c.get("lock_error_sec") is None),
+            "cycles_without_unlock": sum(1 for c in cycles if c.get("unlock_error_sec") is None),
+            "cycles_with_duplicate_unlock": sum(1 for c in cycles if c.get("unlock_calls", 0) > 1),
+        },
+        "cycles": cycles,
+    }
+
+
+def print_report(report):
+    print()
+    print("Startup: first response %.2fs after launch" % report["startup_sec"])
+    print("Wall time: %.1fs  requests: %d  throughput: %.1f req/s" % (
+        report["wall_sec"], report["total_requests"], report["throughput_rps"]))
+    print()
+    print("%-16s %7s %7s %8s %8s %8s %8s  %s" % (
+        "endpoint", "count", "rps", "p50 ms", "p90 ms", "p99 ms", "max ms", "statuses / failures"))
+    for label, e in report["endpoints"].items():
+        extra = dict(e["statuses"])
+        extra.update(e["failures"])
+        print("%-16s %7d %7.1f %8.1f %8.1f %8.1f %8.1f  %s" % (
+            label, e["count"], e["rps"], e["p50_ms"], e["p90_ms"], e["p99_ms"], e["max_ms"], extra))
+    print()
+    print("ESP32 calls :", report["esp32"])
+    print("Bridge calls:", report["bridge"])
+    print()
+    for c in report["cycles"]:
+        if "error" in c:
+            print("cycle %d (%s): %s" % (c["cycle"], c["kind"], c["error"]))
+            continue
+        print("cycle %d (%-5s): lock err %s  unlock err %s  lock calls %d  unlock calls %d" % (
+            c["cycle"], c["kind"],
+            "%+.2fs" % c["lock_error_sec"] if c["lock_error_sec"] is not None else "n/a",
+            "%+.2fs" % c["unlock_error_sec"] if c["unlock_error_sec"] is not None else "n/a",
+            c["lock_calls"], c["unlock_calls"]))
+    print()
+    print("Timing:", report["timing"])
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Nexus end-to-end load harness")
+    p.add_argument("--cycles", type=int, default=4)
+    p.add_argument("--burst-every", type=int, default=2,
+                   help="every Nth cycle is a violation burst cycle (0 = never)")
+    p.add_argument("--clients", type=int, default=20, help="simulated polling clients")
+    p.add_argument("--poll-interval", type=float, default=1.0)
+    p.add_argument("--poll-mode", choices=("fixed", "deadline"), default="fixed",
+                   help="fixed-interval polling or the deadline/heartbeat status contract")
+    p.add_argument("--pre-wait", type=int, default=2, help="pre-wait seconds per session")
+    p.add_argument("--main", type=int, default=4, help="main phase seconds per session")
+    p.add_argument("--burst-size", type=int, default=15)
+    p.add_argument("--video-share", type=float, default=0.3,
+                   help="fraction of burst violations sent as video violations")
+    p.add_argument("--command-batches", type=int, default=20,
+                   help="/bridge_command batches sent per burst cycle")
+    p.add_argument("--command-size", type=int, default=5, help="actions per command batch")
+    p.add_argument("--bridge-tests", type=int, default=1, help="bridge_test calls per cycle")
+    p.add_argument("--hang-sec", type=float, default=10.0)
+    for dev in ("esp32", "bridge"):
+        p.add_argument("--%s-latency-ms" % dev, type=float, default=0.0)
+        p.add_argument("--%s-jitter-ms" % dev, type=float, default=0.0)
+        p.add_argument("--%s-error-rate" % dev, type=float, default=0.0)
+        p.add_argument("--%s-error-mode" % dev, choices=("drop", "500"), default="drop")
+        p.add_argument("--%s-hang-rate" % dev, type=float, default=0.0)
+    p.add_argument("--port", type=int, default=0, help="Nexus port (0 = pick a free one)")
+    p.add_argument("--json", help="also write the report to this file")
+    args = p.parse_args(argv)
+
+    devices = {}
+    for dev in ("esp32", "bridge"):
+        devices[dev] = FakeDevice(
+            dev.upper(),
+            latency_ms=getattr(args, "%s_latency_ms" % dev),
+            jitter_ms=getattr(args, "%s_jitter_ms" % dev),
+            error_rate=getattr(args, "%s_error_rate" % dev),
+            error_mode=getattr(args, "%s_error_mode" % dev),
+            hang_rate=getattr(args, "%s_hang_rate" % dev),
+            hang_sec=args.hang_sec,
+        )
+        devices[dev].start()
+    esp32, bridge = devices["esp32"], devices["bridge"]
+
+    work_dir = tempfile.mkdtemp(prefix="nexus_load_")
+    write_config(work_dir, esp32, bridge)
+    log_path = os.path.join(work_dir, "nexus.log")
+    port = args.port or free_port()
+
+    print("Fake ESP32 at %s, bridge at %s" % (esp32.url, bridge.url))
+    proc, base, startup_sec = launch_nexus(port, work_dir, log_path)
+    print("Nexus at %s (config dir %s), first response after %.2fs" % (base, work_dir, startup_sec))
+
+    stats = Stats()
+    stop = threading.Event()
+    last_seen = {}
+    wake = threading.Event()
+    pollers = [
+        threading.Thread(
+            target=poller,
+            args=(base, stats, args.poll_interval, args.poll_mode, stop, last_seen,
+                  wake if i == 0 else None),
+            daemon=True,
+        )
+        for i in range(max(1, args.clients))
+    ]
+
+    t0 = time.time()
+    cycles = []
+    try:
+        for t in pollers:
+            t.start()
+        for i in range(args.cycles):
+            burst = args.burst_every > 0 and (i + 1) % args.burst_every == 0
+            print("cycle %d/%d (%s)..." % (i + 1, args.cycles, "burst" if burst else "clean"))
+            cycles.append(run_cycle(i + 1, burst, args, base, stats, esp32, bridge, last_seen, wake))
+    finally:
+        stop.set()
+        wake.set()
+        for t in pollers:
+            t.join(timeout=args.poll_interval + 20)
+        wall = time.time() - t0
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        esp32.stop()
+        bridge.stop()
+
+    report = build_report(stats, cycles, esp32, bridge, wall)
+    report["startup_sec"] = startup_sec
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print("Report written to", args.json)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
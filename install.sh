@@ -53,6 +53,8 @@ fi
 echo "[2/7] Installing system dependencies..."
 $SUDO apt update -y
 $SUDO apt install -y python3 python3-venv python3-pip curl
+# Optional: offline TTS for server-side voice clips (falls back to browser speech).
+$SUDO apt install -y espeak-ng || echo "WARNING: espeak-ng not installed; browsers will use their own speech."
 
 echo "[3/7] Resetting install directory..."
 $SUDO rm -rf "$BASE_DIR"
@@ -74,6 +76,7 @@ echo "[5/7] Downloading backend & frontend from GitHub..."
 
 # --- Backend ---
 $CURL "${RAW_BASE}/backend/app.py" -o "$BACKEND_DIR/app.py"
+$CURL "${RAW_BASE}/backend/voice.py" -o "$BACKEND_DIR/voice.py"
 
 # --- Templates ---
 $CURL "${RAW_BASE}/frontend/templates/index.html"   -o "$FRONTEND_DIR/templates/index.html"
@@ -100,6 +103,7 @@ After=network.target
 User=${APP_USER}
 WorkingDirectory=${BASE_DIR}
 Environment=NEXUS_PORT=8080
+Environment=PYTHONUNBUFFERED=1
 Environment=PATH=${BASE_DIR}/venv/bin
 ExecStart=${BASE_DIR}/venv/bin/python backend/app.py
 Restart=always